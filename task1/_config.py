@@ -0,0 +1,22 @@
+"""
+Shared config.yaml loader for app.py and indexer.py.
+Parsed once per process, with PyYAML's C loader when libyaml is available.
+"""
+import os
+from functools import cache
+
+import yaml
+try:
+    from yaml import CSafeLoader as Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as Loader
+
+BASE = os.path.dirname(__file__)
+CONFIG_PATH = os.path.join(BASE, "config.yaml")
+
+
+@cache
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Parse config.yaml (cached per path)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=Loader)
@@ -9,22 +9,73 @@ Prerequisite: build the index first (e.g., `python indexer.py`).
 """
 
 import os
-import yaml
-from flask import Flask, request, jsonify, render_template
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+import orjson
+from flask import Flask, Response, request, render_template
 from whoosh import index
 from whoosh.qparser import MultifieldParser, OrGroup
 from whoosh.scoring import BM25F
 
+from _config import load_config
+
 # --------------------------------------------------------------------
 # Configuration & index path
 # --------------------------------------------------------------------
 BASE = os.path.dirname(__file__)
-CONFIG = yaml.safe_load(open(os.path.join(BASE, "config.yaml"), "r", encoding="utf-8"))
+CONFIG = load_config()
 
 INDEX_DIR = os.path.join(BASE, CONFIG["paths"]["index_dir"])
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 
+# BM25F weighting (boost title > authors > type > title_ngram), built once
+WEIGHTING = BM25F(
+    title_B=1.3,
+    authors_B=1.0,
+    publication_type_B=0.8,
+    title_ngram_B=0.6  # matches the ngram field in indexer.py
+)
+
+# Search across title, title_ngram (for substring), authors, and publication_type
+FIELDS = ["title", "title_ngram", "authors", "publication_type"]
+if not CONFIG.get("indexer", {}).get("title_ngram", True):
+    FIELDS.remove("title_ngram")
+
+# Long-lived index + searcher, shared across requests. A fresh searcher is
+# swapped in when the index version changes, and after SEARCHER_MAX_USES
+# requests to bound the per-(field, term) IDF memo Whoosh keeps on it. The
+# retired one is closed once the last request still using it releases it.
+SEARCHER_MAX_USES = 10_000
+_IX = None
+_LEASE = None  # _Lease for the current searcher
+_SEARCHER_LOCK = threading.Lock()
+
+
+class _Lease:
+    """A shared searcher, the index version it was opened at, its requests in flight and served so far."""
+    __slots__ = ("searcher", "version", "users", "uses", "retired")
+
+    def __init__(self, searcher, version):
+        self.searcher = searcher
+        self.version = version
+        self.users = 0
+        self.uses = 0
+        self.retired = False
+
+    def retire(self):
+        """Stop handing this searcher out; close it now if nobody is using it."""
+        self.retired = True
+        if self.users == 0:
+            self.searcher.close()
+
+
+def ojson(obj, status: int = 200) -> Response:
+    """JSON response serialized with orjson (handles datetimes natively)."""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
 
 def index_ready() -> bool:
     """Return True if a Whoosh index exists in INDEX_DIR."""
@@ -38,6 +89,134 @@ def open_ix():
     return index.open_dir(INDEX_DIR)
 
 
+def index_version(ix):
+    """
+    (generation, TOC mtime) of the latest commit, or None if the TOC vanished
+    mid-check. indexer.py rebuilds the index from scratch on a schema change,
+    which restarts generation numbering, so the generation alone can repeat.
+    """
+    gen = ix.latest_generation()
+    try:
+        return gen, ix.storage.file_modified(f"_{ix.indexname}_{gen}.toc")
+    except OSError:
+        return None
+
+
+@contextmanager
+def use_searcher():
+    """
+    Yield (searcher, index version) for the shared BM25F searcher, opening
+    the index on first use. A new searcher is opened only when the index
+    version changes (i.e. after indexer.py commits or rebuilds), so segment
+    files and per-field stats are loaded once rather than on every request.
+    """
+    global _IX, _LEASE
+    with _SEARCHER_LOCK:
+        if _LEASE is None:
+            _IX = open_ix()
+            _LEASE = _Lease(_IX.searcher(weighting=WEIGHTING), index_version(_IX))
+        else:
+            version = index_version(_IX)
+            if _LEASE.uses >= SEARCHER_MAX_USES or (version is not None and version != _LEASE.version):
+                # Not Searcher.refresh(): it closes reused readers still in use by other requests
+                _LEASE.retire()
+                _LEASE = _Lease(_IX.searcher(weighting=WEIGHTING), version)
+        lease = _LEASE
+        lease.users += 1
+        lease.uses += 1
+    try:
+        yield lease.searcher, lease.version
+    finally:
+        with _SEARCHER_LOCK:
+            lease.users -= 1
+            if lease.retired and lease.users == 0:
+                lease.searcher.close()
+
+
+def current_version():
+    """Index version of the shared searcher, swapping in a fresh one if stale."""
+    with use_searcher() as (_, version):
+        return version
+
+
+@atexit.register
+def close_searcher():
+    """Release the shared searcher's file handles on shutdown."""
+    global _LEASE
+    with _SEARCHER_LOCK:
+        if _LEASE is not None:
+            _LEASE.retire()
+            _LEASE = None
+
+
+@lru_cache(maxsize=4096)
+def _parse_query(q: str, version: tuple):
+    """
+    Parse a raw query string with the multifield OR parser (memoized).
+    Keyed on the index version too: field analyzers (e.g. the title_ngram
+    sizes) come from the live schema, which a rebuild can change.
+    """
+    with use_searcher() as (s, _):
+        schema = s.schema
+    parser = MultifieldParser(FIELDS, schema=schema, group=OrGroup.factory(0.9))
+    return parser.parse(q)
+
+
+def _hit_to_dict(h) -> dict:
+    """Project a Whoosh hit to the JSON row returned by /api/search."""
+    authors_json = h.get("authors_json")
+    if authors_json:
+        # structured authors stored by indexer.py
+        authors_struct = orjson.loads(authors_json)
+        authors_list = [a["name"] for a in authors_struct]
+        links_list = [a["profile_url"] for a in authors_struct]
+    else:
+        # indexes built before authors_json: parse the flat fields
+        # authors: KEYWORD stored as comma-separated
+        authors_list = []
+        raw_authors = h.get("authors", "")
+        if isinstance(raw_authors, str) and raw_authors.strip():
+            authors_list = [a.strip() for a in raw_authors.split(",") if a.strip()]
+
+        # author_links stored as semicolon-separated string
+        links_list = []
+        raw_links = h.get("author_links", "")
+        if isinstance(raw_links, str) and raw_links.strip():
+            links_list = [u.strip() for u in raw_links.split(";") if u.strip()]
+
+    return {
+        "title": h.get("title", ""),
+        "year": h.get("year"),
+        "url": h.get("url"),
+        "authors": authors_list,
+        "author_links": links_list,
+        "publication_type": h.get("publication_type", ""),
+        "crawled_at": h.get("crawled_at"),
+        "score": float(getattr(h, "score", 0.0)),
+    }
+
+
+@lru_cache(maxsize=1024)
+def _do_search(q: str, sort: str, version: tuple) -> list:
+    """
+    Run the query and serialize hits to JSON-ready rows (memoized).
+    `version` (see index_version) is part of the cache key so results
+    computed against an older or rebuilt index are never served after
+    indexer.py commits a new one.
+    """
+    query = _parse_query(q, version)
+
+    # Default: relevance; optional sorts are applied in the same search
+    kwargs = {"limit": 100}
+    if sort == "year":
+        kwargs.update(sortedby="year", reverse=True)
+    elif sort == "recent":
+        kwargs.update(sortedby="crawled_at", reverse=True)
+    with use_searcher() as (s, _):
+        hits = s.search(query, **kwargs)
+        return [_hit_to_dict(h) for h in hits]
+
+
 # --------------------------------------------------------------------
 # Routes
 # --------------------------------------------------------------------
@@ -52,10 +231,9 @@ def home():
 def stats():
     """Small health endpoint for the UI."""
     if not index_ready():
-        return jsonify({"ready": False, "docs": 0})
-    ix = open_ix()
-    with ix.searcher() as s:
-        return jsonify({"ready": True, "docs": s.doc_count_all()})
+        return ojson({"ready": False, "docs": 0})
+    with use_searcher() as (s, _):
+        return ojson({"ready": True, "docs": s.doc_count()})
 
 
 @app.get("/api/search")
@@ -73,59 +251,11 @@ def api_search():
     sort = (request.args.get("sort") or "relevance").lower()
 
     if not q:
-        return jsonify({"query": q, "results": []})
-
-    ix = open_ix()
-
-    # BM25F weighting (boost title > authors > type > title_ngram)
-    weighting = BM25F(
-        title_B=1.3,
-        authors_B=1.0,
-        publication_type_B=0.8,
-        title_ngram_B=0.6  # matches the ngram field in indexer.py
-    )
-
-    # Search across title, title_ngram (for substring), authors, and publication_type
-    fields = ["title", "title_ngram", "authors", "publication_type"]
-    parser = MultifieldParser(fields, schema=ix.schema, group=OrGroup.factory(0.9))
-    query = parser.parse(q)
-
-    with ix.searcher(weighting=weighting) as s:
-        # Default: relevance
-        hits = s.search(query, limit=100)
-
-        # Optional sorts
-        if sort == "year":
-            hits = s.search(query, limit=100, sortedby="year", reverse=True)
-        elif sort == "recent":
-            hits = s.search(query, limit=100, sortedby="crawled_at", reverse=True)
-
-        rows = []
-        for h in hits:
-            # authors: KEYWORD stored as comma-separated
-            authors_list = []
-            raw_authors = h.get("authors", "")
-            if isinstance(raw_authors, str) and raw_authors.strip():
-                authors_list = [a.strip() for a in raw_authors.split(",") if a.strip()]
-
-            # author_links stored as semicolon-separated string
-            links_list = []
-            raw_links = h.get("author_links", "")
-            if isinstance(raw_links, str) and raw_links.strip():
-                links_list = [u.strip() for u in raw_links.split(";") if u.strip()]
-
-            rows.append({
-                "title": h.get("title", ""),
-                "year": h.get("year"),
-                "url": h.get("url"),
-                "authors": authors_list,
-                "author_links": links_list,
-                "publication_type": h.get("publication_type", ""),
-                "crawled_at": h.get("crawled_at"),
-                "score": float(getattr(h, "score", 0.0)),
-            })
-
-    return jsonify({"query": q, "results": rows})
+        return ojson({"query": q, "results": []})
+
+    rows = _do_search(q, sort, current_version())
+
+    return ojson({"query": q, "results": rows})
 
 
 # --------------------------------------------------------------------
@@ -1,7 +1,8 @@
 """
 Coventry PurePortal Publications Crawler
 ----------------------------------------
-- Uses Selenium to render dynamic PurePortal pages.
+- Fetches static listing pages over a pooled HTTP session; falls back to
+  Selenium only when a page needs JS rendering.
 - Crawls department persons, then scrapes each person's research outputs.
 - Saves results to:
     - data/publications.jsonl  (JSON Lines; 1 record per line)  <-- for indexer.py
@@ -10,13 +11,17 @@ Coventry PurePortal Publications Crawler
 
 import os
 import re
+import csv
 import time
 import json
 import hashlib
 import logging
-import pandas as pd
+import threading
+import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
 from selenium import webdriver
@@ -36,6 +41,12 @@ DEPT_PERSONS_URL = BASE_URL + "/en/organisations/fbl-school-of-economics-finance
 DATA_DIR = "data"
 JSONL_FILE = os.path.join(DATA_DIR, "publications.jsonl")  # JSONL for indexer
 CSV_FILE = os.path.join(DATA_DIR, "publications.csv")      # Optional: flat view
+CSV_COLUMNS = ["title", "year", "type", "authors", "author_links", "url"]
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+HTTP_TIMEOUT = 10  # seconds, per request
+MAX_WORKERS = 4         # concurrent person scrapes
+REQUESTS_PER_SEC = 4.0  # global politeness cap across all workers
+_YEAR_RE = re.compile(r"\b\d{4}\b")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -49,30 +60,99 @@ def stable_id(title: str, url: str) -> str:
     """Deterministic ID for deduplication."""
     return hashlib.md5((title + url).encode("utf-8")).hexdigest()
 
-def write_jsonl(path: str, records: List[Dict]) -> None:
-    """Write a list of dicts to JSONL (overwrites the file)."""
-    with open(path, "w", encoding="utf-8") as f:
+def parse_year(text: str) -> str | None:
+    """First 4-digit year in a date string ("2024", "Jan 2024", ...)."""
+    # Plain tokens cover the usual PurePortal formats without the regex engine
+    for tok in text.split():
+        if len(tok) == 4 and tok.isascii() and tok.isdigit():
+            return tok
+    m = _YEAR_RE.search(text)  # e.g. "01/2024", "2024,"
+    return m.group(0) if m else None
+
+def write_jsonl(path: str, records: List[Dict], mode: str = "w") -> None:
+    """Write a list of dicts to JSONL ("w" overwrites, "a" appends)."""
+    with open(path, mode, encoding="utf-8", buffering=1 << 20) as f:
         for r in records:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
 
+class RateLimiter:
+    """Global min-interval limiter shared by all worker threads."""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
 # -------------------------------------------------------------------
 # Crawler Class
 # -------------------------------------------------------------------
 class CoventryCrawler:
     def __init__(self, headless: bool = True):
-        self.driver = self._setup_driver(headless)
+        self.headless = headless
+        self._driver = None  # launched lazily, only if a page needs JS
+        self._driver_lock = threading.Lock()  # WebDriver is not thread-safe
+        self.limiter = RateLimiter(REQUESTS_PER_SEC)
+        self.http = self._setup_http()
         self.publications: List[Dict] = []
+        self._seen_ids: set[str] = set()
+        self._saved_count = 0  # publications already flushed to JSONL
+        self._cols: Dict[str, list] = {c: [] for c in CSV_COLUMNS}  # flat CSV view, one list per column
+
+    @property
+    def driver(self):
+        """Selenium Chrome driver, started on first use."""
+        if self._driver is None:
+            self._driver = self._setup_driver(self.headless)
+        return self._driver
+
+    def close(self):
+        """Quit the browser (if it was ever started) and release HTTP connections."""
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+        self.http.close()
 
     def _setup_driver(self, headless: bool):
         options = Options()
         if headless:
             options.add_argument("--headless=new")  # new headless for Chrome 109+
         options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+        options.add_argument(f"user-agent={USER_AGENT}")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
         return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
 
+    def _setup_http(self) -> requests.Session:
+        """Keep-alive HTTP session with a connection pool for static pages."""
+        session = requests.Session()
+        session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=50, pool_maxsize=50, max_retries=3)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _fetch_soup(self, url: str) -> BeautifulSoup | None:
+        """Fetch a page over HTTP and parse it; None on any request error."""
+        self.limiter.wait()
+        try:
+            # Closing the streamed response returns its connection to the pool,
+            # including when raise_for_status() fires before the body is read
+            with self.http.get(url, stream=True, timeout=HTTP_TIMEOUT) as resp:
+                resp.raise_for_status()
+                html = b"".join(resp.iter_content(chunk_size=64 * 1024))
+        except requests.RequestException as e:
+            logger.warning(f"HTTP fetch failed for {url}: {e}")
+            return None
+        return BeautifulSoup(html, "html.parser")
+
     def _accept_cookies(self):
         """Best-effort accept of cookie banner (if present)."""
         try:
@@ -84,8 +164,42 @@ class CoventryCrawler:
         except Exception:
             pass
 
+    @staticmethod
+    def _parse_person_cards(soup: BeautifulSoup) -> List[Dict]:
+        return [{
+            "name": a.text.strip(),
+            "url": urljoin(BASE_URL, a.get("href", ""))
+        } for a in soup.select("div.result-container h3.title a")]
+
     def get_all_persons(self) -> List[Dict]:
         """Collect all persons in the department (across paginated list)."""
+        persons = self._get_all_persons_http()
+        if not persons:
+            logger.info("No person cards in static HTML; falling back to Selenium")
+            persons = self._get_all_persons_selenium()
+        logger.info(f"Found {len(persons)} persons")
+        return persons
+
+    def _get_all_persons_http(self) -> List[Dict]:
+        """Walk the paginated persons list by following 'next' links."""
+        persons: List[Dict] = []
+        url = DEPT_PERSONS_URL
+        while url:
+            soup = self._fetch_soup(url)
+            if soup is None:
+                break
+            cards = self._parse_person_cards(soup)
+            if not cards:
+                break
+            persons.extend(cards)
+            # pagination
+            next_link = soup.select_one("a.nextLink")
+            if not next_link or not next_link.get("href") or "disabled" in (next_link.get("class") or []):
+                break
+            url = urljoin(BASE_URL, next_link["href"])
+        return persons
+
+    def _get_all_persons_selenium(self) -> List[Dict]:
         persons: List[Dict] = []
         self.driver.get(DEPT_PERSONS_URL)
         time.sleep(2)
@@ -93,12 +207,7 @@ class CoventryCrawler:
 
         while True:
             soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            cards = soup.select("div.result-container h3.title a")
-            for a in cards:
-                persons.append({
-                    "name": a.text.strip(),
-                    "url": urljoin(BASE_URL, a.get("href", ""))
-                })
+            persons.extend(self._parse_person_cards(soup))
             # pagination
             try:
                 next_btn = self.driver.find_element(By.CSS_SELECTOR, "a.nextLink")
@@ -108,13 +217,38 @@ class CoventryCrawler:
                 time.sleep(2)
             except Exception:
                 break
-
-        logger.info(f"Found {len(persons)} persons")
         return persons
 
     def scrape_person_publications(self, person: Dict) -> List[Dict]:
         """Scrape all publications visible on a person's page."""
+        containers = self._person_containers_http(person)
+        if not containers:
+            with self._driver_lock:
+                containers = self._person_containers_selenium(person)
+
         pubs: List[Dict] = []
+        now_iso = datetime.now().isoformat()  # one crawl instant per page
+        for c in containers:
+            pub = self._parse_pub_container(c, person, now_iso)
+            if pub:
+                pubs.append(pub)
+        return pubs
+
+    def _person_containers_http(self, person: Dict) -> list:
+        """Publication containers from static HTML (empty if JS is needed)."""
+        soup = self._fetch_soup(person["url"])
+        if soup is None:
+            return []
+
+        # Follow "View all research outputs" if present
+        more = soup.find(lambda t: t.name == "a" and "research output" in t.get_text())
+        if more and more.get("href"):
+            soup = self._fetch_soup(urljoin(BASE_URL, more["href"])) or soup
+
+        return soup.find_all("div", class_="result-container")
+
+    def _person_containers_selenium(self, person: Dict) -> list:
+        self.limiter.wait()
         self.driver.get(person["url"])
         time.sleep(2)
 
@@ -129,14 +263,9 @@ class CoventryCrawler:
             pass
 
         soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        containers = soup.find_all("div", class_="result-container")
-        for c in containers:
-            pub = self._parse_pub_container(c, person)
-            if pub:
-                pubs.append(pub)
-        return pubs
+        return soup.find_all("div", class_="result-container")
 
-    def _parse_pub_container(self, container, person: Dict) -> Dict | None:
+    def _parse_pub_container(self, container, person: Dict, now_iso: str) -> Dict | None:
         """Extract a publication from a listing container."""
         title_elem = container.find("h3", class_="title")
         if not title_elem:
@@ -153,15 +282,13 @@ class CoventryCrawler:
             "year": None,
             "publication_type": None,
             "authors": [],
-            "crawled_at": datetime.now().isoformat()
+            "crawled_at": now_iso
         }
 
         # Year (from visible date span)
         date_elem = container.find("span", class_="date")
         if date_elem:
-            m = re.search(r"\b\d{4}\b", date_elem.get_text(" ", strip=True))
-            if m:
-                pub["year"] = m.group(0)
+            pub["year"] = parse_year(date_elem.get_text(" ", strip=True))
 
         # Type
         type_elem = container.find("span", class_="type")
@@ -187,41 +314,67 @@ class CoventryCrawler:
         if limit:
             persons = persons[:limit]
 
-        for i, person in enumerate(persons, 1):
-            logger.info(f"[{i}/{len(persons)}] {person['name']}")
-            pubs = self.scrape_person_publications(person)
+        # Scrape persons concurrently (politeness is enforced by self.limiter);
+        # ex.map yields in person order on this thread, so no lock is needed
+        # around self.publications / self._seen_ids.
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            results = ex.map(self.scrape_person_publications, persons)
+            for i, (person, pubs) in enumerate(zip(persons, results), 1):
+                logger.info(f"[{i}/{len(persons)}] {person['name']}")
 
-            # Deduplicate by stable id
-            for p in pubs:
-                if not any(x["id"] == p["id"] for x in self.publications):
-                    self.publications.append(p)
+                # Deduplicate by stable id
+                for p in pubs:
+                    if p["id"] not in self._seen_ids:
+                        self._seen_ids.add(p["id"])
+                        self._add_publication(p)
 
-            time.sleep(1.5)  # politeness
-            if i % 10 == 0:
-                self.save()
+                if i % 10 == 0:
+                    self.save()
 
-        self.save()
+        self.save(final=True)
         logger.info(f"✓ Done. {len(self.publications)} unique publications.")
 
-    def save(self):
-        """Persist as JSONL (for indexer) + CSV (for quick viewing)."""
+    def _add_publication(self, p: Dict):
+        """Record a new publication in both the JSONL list and the CSV columns."""
+        self.publications.append(p)
+        authors = p.get("authors", [])
+        self._cols["title"].append(p["title"])
+        self._cols["year"].append(p.get("year"))
+        self._cols["type"].append(p.get("publication_type"))
+        self._cols["authors"].append(", ".join(a["name"] for a in authors))
+        self._cols["author_links"].append("; ".join(a["profile_url"] for a in authors))
+        self._cols["url"].append(p["url"])
+
+    def save(self, final: bool = False):
+        """
+        Persist as JSONL (for indexer) + CSV (for quick viewing).
+        JSONL is append-only: each call writes just the records added since the
+        previous save (the first save of a crawl truncates the file). The CSV
+        is a full snapshot, so it is only written on the final save.
+        """
         # JSONL
-        write_jsonl(JSONL_FILE, self.publications)
-        logger.info(f"[SAVE] Wrote {len(self.publications)} records to {JSONL_FILE}")
+        new = self.publications[self._saved_count:]
+        write_jsonl(JSONL_FILE, new, mode="a" if self._saved_count else "w")
+        self._saved_count = len(self.publications)
+        logger.info(f"[SAVE] Appended {len(new)} records to {JSONL_FILE} ({self._saved_count} total)")
+
+        if not final:
+            return
 
         # CSV (flat)
-        df = pd.DataFrame([{
-            "title": p["title"],
-            "year": p.get("year"),
-            "type": p.get("publication_type"),
-            "authors": ", ".join(a["name"] for a in p.get("authors", [])),
-            "author_links": "; ".join(a["profile_url"] for a in p.get("authors", [])),
-            "url": p["url"]
-        } for p in self.publications])
-        df.to_csv(CSV_FILE, index=False)
+        with open(CSV_FILE, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f, lineterminator=os.linesep)
+            w.writerow(CSV_COLUMNS)
+            w.writerows(zip(*(self._cols[c] for c in CSV_COLUMNS)))
         logger.info(f"[SAVE] CSV written to {CSV_FILE}")
 
 # -------------------------------------------------------------------
-if __name__ == "__main__":
+def main():
     crawler = CoventryCrawler(headless=True)
-    crawler.crawl(limit=5)  # remove limit for full crawl
+    try:
+        crawler.crawl(limit=5)  # remove limit for full crawl
+    finally:
+        crawler.close()
+
+if __name__ == "__main__":
+    main()
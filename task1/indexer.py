@@ -1,41 +1,64 @@
-import os, json, yaml, shutil
+import os, json, shutil
+import orjson
 from whoosh import index
 from whoosh.fields import Schema, TEXT, KEYWORD, ID, NUMERIC, STORED, DATETIME
-from whoosh.analysis import StemmingAnalyzer, NgramWordAnalyzer
-from whoosh.writing import AsyncWriter
+from whoosh.analysis import StemmingAnalyzer, NgramWordAnalyzer, NgramFilter
 from datetime import datetime
 
+from _config import load_config
+
 # -------------------------------------------------------------------
-# Config & paths
+# Config & paths (re-read on every run, see load_settings)
 # -------------------------------------------------------------------
 BASE = os.path.dirname(__file__)
-CONFIG = yaml.safe_load(open(os.path.join(BASE, "config.yaml"), "r", encoding="utf-8"))
-DATA_PATH = os.path.join(BASE, CONFIG["paths"]["data_jsonl"])
-INDEX_DIR = os.path.join(BASE, CONFIG["paths"]["index_dir"])
-os.makedirs(INDEX_DIR, exist_ok=True)
 
 # -------------------------------------------------------------------
 # Schema definition (aligned with crawler fields)
 # -------------------------------------------------------------------
-schema = Schema(
-    doc_id=ID(stored=True, unique=True),
-    title=TEXT(stored=True, analyzer=StemmingAnalyzer()),          # normal stemming
-    title_ngram=TEXT(stored=False, analyzer=NgramWordAnalyzer(3,6)), # partial/substring search
-    authors=KEYWORD(stored=True, commas=True, lowercase=True, scorable=True),
-    year=NUMERIC(stored=True),
-    url=STORED,
-    author_links=STORED,
-    publication_type=TEXT(stored=True, analyzer=StemmingAnalyzer()),
-    crawled_at=DATETIME(stored=True)
-)
+def build_schema(title_ngram=True, ngram_min=4, ngram_max=5):
+    schema = Schema(
+        doc_id=ID(stored=True, unique=True),
+        title=TEXT(stored=True, analyzer=StemmingAnalyzer()),          # normal stemming
+        authors=KEYWORD(stored=True, commas=True, lowercase=True, scorable=True),
+        year=NUMERIC(stored=True),
+        url=STORED,
+        author_links=STORED,
+        authors_json=STORED,  # [{"name", "profile_url"}, ...] for the API, no re-splitting
+        publication_type=TEXT(stored=True, analyzer=StemmingAnalyzer()),
+        crawled_at=DATETIME(stored=True)
+    )
+    if title_ngram:
+        # partial/substring search
+        schema.add("title_ngram", TEXT(stored=False, analyzer=NgramWordAnalyzer(ngram_min, ngram_max)))
+    return schema
+
+def load_settings():
+    """
+    Read config.yaml afresh and derive paths, indexer options and the schema.
+    The scheduler imports this module once and calls main() every week, so
+    settings computed at import time would ignore later config edits.
+    """
+    load_config.cache_clear()
+    config = load_config()
+    # Substring field: postings grow with sum(L - n + 1) for n in [min, max],
+    # so a narrow n-gram range keeps the index small.
+    cfg = config.get("indexer", {})
+    title_ngram = cfg.get("title_ngram", True)
+    return {
+        "data_path": os.path.join(BASE, config["paths"]["data_jsonl"]),
+        "index_dir": os.path.join(BASE, config["paths"]["index_dir"]),
+        "title_ngram": title_ngram,
+        "max_segments": cfg.get("max_segments", 4),
+        "schema": build_schema(title_ngram, cfg.get("ngram_min", 4), cfg.get("ngram_max", 5)),
+    }
 
 # -------------------------------------------------------------------
 # Demo record (only if no crawl data yet)
 # -------------------------------------------------------------------
-def seed_demo_if_missing():
-    if os.path.exists(DATA_PATH):
+def seed_demo_if_missing(data_path):
+    if os.path.exists(data_path):
         return
-    os.makedirs(os.path.dirname(DATA_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
     demo = {
         "id": "demo-efa-1",
         "title": "Fiscal Policy and Market Volatility",
@@ -47,12 +70,19 @@ def seed_demo_if_missing():
         "publication_type": "Journal Article",
         "crawled_at": datetime.now().isoformat()
     }
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
+    with open(data_path, "w", encoding="utf-8") as f:
         f.write(json.dumps(demo, ensure_ascii=False) + "\n")
 
 # -------------------------------------------------------------------
 # Safe open/create index (drops if schema mismatch)
 # -------------------------------------------------------------------
+def ngram_sizes(field):
+    """(min, max) of a field's NgramFilter, or None (Whoosh's field equality ignores these)."""
+    for item in getattr(field.analyzer, "items", []):
+        if isinstance(item, NgramFilter):
+            return (item.min, item.max)
+    return None
+
 def safe_open_or_create(index_dir, schema):
     if not index.exists_in(index_dir):
         return index.create_in(index_dir, schema)
@@ -60,7 +90,7 @@ def safe_open_or_create(index_dir, schema):
         ix = index.open_dir(index_dir)
         # Check schema mismatch (e.g., title_ngram missing)
         for field in schema.names():
-            if field not in ix.schema.names():
+            if field not in ix.schema.names() or ngram_sizes(ix.schema[field]) != ngram_sizes(schema[field]):
                 print("[Indexer] Schema mismatch detected — rebuilding index...")
                 shutil.rmtree(index_dir)
                 os.makedirs(index_dir, exist_ok=True)
@@ -75,12 +105,25 @@ def safe_open_or_create(index_dir, schema):
 # Indexing
 # -------------------------------------------------------------------
 def main():
-    seed_demo_if_missing()
+    settings = load_settings()
+    index_dir = settings["index_dir"]
+    os.makedirs(index_dir, exist_ok=True)
+    seed_demo_if_missing(settings["data_path"])
+
+    ix = safe_open_or_create(index_dir, settings["schema"])
 
-    ix = safe_open_or_create(INDEX_DIR, schema)
-    writer = AsyncWriter(ix)
+    # Ids already in the index: those need update_document (delete + add),
+    # everything else goes through the cheaper add_document. Read from the
+    # doc_id term list rather than loading every stored field; ids left only
+    # by deleted docs just take the (still correct) update path.
+    with ix.reader() as reader:
+        existing = set(reader.field_terms("doc_id"))
+    seen = set()
 
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
+    # Multi-process segment building with a larger posting buffer
+    writer = ix.writer(procs=4, limitmb=512, multisegment=True)
+
+    with open(settings["data_path"], "r", encoding="utf-8", buffering=1 << 20) as f:
         for line in f:
             if not line.strip():
                 continue
@@ -89,8 +132,17 @@ def main():
             except json.JSONDecodeError:
                 continue
 
+            doc_id = obj.get("id", "")
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+
             # Extract authors
-            authors = [a.get("name", "") for a in obj.get("authors", []) if a.get("name")]
+            authors_struct = [
+                {"name": a["name"], "profile_url": a.get("profile_url", "")}
+                for a in obj.get("authors", []) if a.get("name")
+            ]
+            authors = [a["name"] for a in authors_struct]
             links = [a.get("profile_url", "") for a in obj.get("authors", []) if a.get("profile_url")]
 
             # Parse crawled_at
@@ -101,20 +153,31 @@ def main():
                 except Exception:
                     pass
 
-            writer.update_document(
-                doc_id=obj.get("id", ""),
+            add = writer.update_document if doc_id in existing else writer.add_document
+            doc = dict(
+                doc_id=doc_id,
                 title=obj.get("title", ""),
-                title_ngram=obj.get("title", ""),   # NEW field for substring matching
                 authors=",".join(authors),
                 year=obj.get("year"),
                 url=obj.get("url", ""),
                 author_links="; ".join(links),
+                authors_json=orjson.dumps(authors_struct).decode(),
                 publication_type=obj.get("publication_type", ""),
                 crawled_at=crawled_dt
             )
+            if settings["title_ngram"]:
+                doc["title_ngram"] = doc["title"]  # field for substring matching
+            add(**doc)
+
+    writer.commit(optimize=False)  # cheap commit; segments are merged below once they pile up
 
-    writer.commit()
-    print(f"[Indexer] Index updated at {INDEX_DIR}")
+    # Each multisegment run adds segments and leaves updated docs behind as
+    # deletions; fold everything into one segment once past the threshold.
+    with ix.reader() as reader:
+        n_segments = len(reader.leaf_readers())
+    if n_segments > settings["max_segments"] or ix.doc_count_all() > 2 * ix.doc_count():
+        ix.optimize()
+    print(f"[Indexer] Index updated at {index_dir}")
 
 # -------------------------------------------------------------------
 if __name__ == "__main__":
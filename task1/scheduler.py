@@ -1,33 +1,39 @@
 """
 Weekly Scheduler
 ----------------
-Runs crawler.py and indexer.py every Sunday at 03:30 (Asia/Kathmandu time).
+Runs the crawler and indexer every Sunday at 03:30 (Asia/Kathmandu time).
+Both run in-process (no interpreter start-up or re-imports per job).
 Keeps running in the foreground; stop with Ctrl+C.
 """
-import os
-import sys
 import datetime
-import subprocess
+import logging
 from apscheduler.schedulers.blocking import BlockingScheduler
 
-BASE = os.path.dirname(__file__) # Base directory (same as this file)
+from crawler import main as crawler_main
+from indexer import main as indexer_main
 
-SCRIPTS = [
-    os.path.join(BASE, "crawler.py"),
-    os.path.join(BASE, "indexer.py"),
+logger = logging.getLogger("Scheduler")
+
+STEPS = [
+    ("crawler", crawler_main),
+    ("indexer", indexer_main),
 ]
 
-def run_script(path: str):
-    """Run a Python script with the same interpreter, log start/end times."""
+def run_step(name: str, fn):
+    """Run one pipeline step, log start/end times and any traceback."""
     ts = datetime.datetime.now().isoformat()
-    print(f"[{ts}] Starting {os.path.basename(path)}")
-    result = subprocess.run([sys.executable, path])
-    print(f"[{ts}] Finished {os.path.basename(path)} (exit code {result.returncode})")
+    print(f"[{ts}] Starting {name}")
+    try:
+        fn()
+    except Exception:
+        logger.exception(f"{name} failed")
+        return
+    print(f"[{ts}] Finished {name}")
 
 def job():
-    """Job that runs all scripts sequentially."""
-    for script in SCRIPTS:
-        run_script(script)
+    """Job that runs all steps sequentially."""
+    for name, fn in STEPS:
+        run_step(name, fn)
 
 if __name__ == "__main__":
     # Scheduler with local timezone (Kathmandu). Use "UTC" if you prefer.
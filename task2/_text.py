@@ -0,0 +1,21 @@
+"""
+Shared text analyzer for train.py and the pipelines it pickles for app.py.
+Kept in its own module so the saved vectorizers reference `_text.analyze`
+rather than `__main__`, and so app.py can unpickle them.
+"""
+import re
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")  # sklearn's default token_pattern, compiled once
+STOP = frozenset(ENGLISH_STOP_WORDS)
+
+
+def analyze(doc):
+    """
+    Lowercase, tokenize and drop stop words in a single pass, then append the
+    space-joined bigrams. Produces the same features as
+    TfidfVectorizer(lowercase=True, stop_words='english', ngram_range=(1, 2)).
+    """
+    toks = [t for t in TOKEN_RE.findall(doc.lower()) if t not in STOP]
+    return toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
@@ -1,5 +1,7 @@
-import os, json, joblib
-from flask import Flask, request, jsonify, render_template
+import os, time, queue, threading, joblib, orjson
+import numpy as np
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from flask import Flask, Response, request, render_template
 
 BASE = os.path.dirname(__file__)
 DATA = os.path.join(BASE, "data")
@@ -8,30 +10,127 @@ NB = os.path.join(MODELS, "nb_pipeline.joblib")
 LR = os.path.join(MODELS, "lr_pipeline.joblib")
 BEST = os.path.join(MODELS, "best_pipeline.joblib")
 METRICS = os.path.join(DATA, "metrics.json")
+MODEL_PATHS = {"nb": NB, "lr": LR, "auto": BEST}
+
+# Pipelines and their top terms, kept in RAM between requests.
+# Keyed by file mtime so a retrain (python train.py) is picked up without restart;
+# each entry is swapped in whole under _MODEL_LOCK so a model never pairs with another's terms.
+PIPELINES = {}  # name -> (mtime, pipeline, {label: [top indicative terms]})
+TOP_K = 15
+_MODEL_LOCK = threading.Lock()
+
+# /predict micro-batching: concurrent requests are collated into one
+# predict/predict_proba call per model, drained every BATCH_WINDOW seconds
+# or as soon as BATCH_MAX texts are waiting.
+BATCH_WINDOW = 0.01
+BATCH_MAX = 32
+PREDICT_TIMEOUT = 2
+_BATCH_QUEUE = queue.Queue()  # (model name, text, Future)
 
 app = Flask(__name__)
 
+def ojson(obj, status=200):
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), status=status, mimetype="application/json")
+
 def models_ready():
     return all(os.path.exists(p) for p in [NB, LR, BEST])
 
+def to_float32(model):
+    """
+    Downcast the fitted TF-IDF and classifier arrays to float32 for inference.
+    Halves their memory and bandwidth in the sparse x dense predict path; the
+    argmax is unchanged in practice.
+    """
+    vec = model.named_steps["tfidf"]; clf = model.named_steps["clf"]
+    # "tfidf" is a TfidfVectorizer, or a Hashing -> TfidfTransformer pipeline on large corpora
+    for step in (vec[:] if hasattr(vec, "steps") else [vec]):
+        if hasattr(step, "dtype"): step.dtype = np.float32  # transform() now emits float32 CSR
+        if getattr(step, "use_idf", False) and hasattr(step, "idf_"):
+            step.idf_ = step.idf_.astype(np.float32, copy=False)
+    for attr in ("coef_", "intercept_", "feature_log_prob_", "class_log_prior_"):
+        if hasattr(clf, attr): setattr(clf, attr, getattr(clf, attr).astype(np.float32, copy=False))
+    return model
+
 def load_pipeline(name):
-    path = {"nb": NB, "lr": LR, "auto": BEST}[name]
+    """Return (pipeline, top terms by label), reloading when the model file changes."""
+    path = MODEL_PATHS[name]
     if not os.path.exists(path): raise RuntimeError("Model not found. Run: python train.py")
-    return joblib.load(path)
-
-def top_terms(model, label, k=12):
-    try:
-        import numpy as np
-        vec = model.named_steps["tfidf"]; clf = model.named_steps["clf"]
-        feat = np.array(vec.get_feature_names_out())
-        if hasattr(clf, "coef_"):
-            idx = list(clf.classes_).index(label)
-            coefs = clf.coef_[idx]; top = np.argsort(coefs)[-k:][::-1]; return feat[top].tolist()
-        if hasattr(clf, "feature_log_prob_"):
-            idx = list(clf.classes_).index(label)
-            logp = clf.feature_log_prob_[idx]; top = np.argsort(logp)[-k:][::-1]; return feat[top].tolist()
-    except Exception: pass
-    return []
+    mtime = os.path.getmtime(path)
+    with _MODEL_LOCK:
+        cached = PIPELINES.get(name)
+        if cached is None or cached[0] != mtime:
+            model = to_float32(joblib.load(path))
+            top = top_terms_by_class(model, feature_names(model.named_steps["tfidf"]), k=TOP_K)
+            cached = PIPELINES[name] = (mtime, model, top)
+    return cached[1], cached[2]
+
+def feature_names(vec):
+    """Vocabulary as an array, or None for hashed features (no vocabulary kept)."""
+    try: return np.array(vec.get_feature_names_out())
+    except (AttributeError, ValueError): return None
+
+def top_terms_by_class(model, feat, k=12):
+    """Top-k indicative terms for every class; coefficients are fixed once loaded."""
+    if feat is None: return {}
+    clf = model.named_steps["clf"]
+    weights = getattr(clf, "coef_", None)
+    if weights is None: weights = getattr(clf, "feature_log_prob_", None)
+    if weights is None: return {}
+    k = min(k, weights.shape[1])
+    out = {}
+    for label, w in zip(clf.classes_, weights):
+        top = np.argpartition(w, -k)[-k:]  # O(V) selection instead of a full argsort
+        top = top[np.argsort(w[top])][::-1]
+        out[label] = feat[top].tolist()
+    return out
+
+def _classify_batch(name, texts):
+    """(label, [(class, prob)] sorted desc or None, top terms) per text, all from one model."""
+    model, top_terms = load_pipeline(name)
+    Xv = model[:-1].transform(texts)  # TF-IDF runs once for labels and probabilities
+    clf = model[-1]
+    if hasattr(clf, 'predict_proba'):
+        probas = clf.predict_proba(Xv)
+        labels = clf.classes_[probas.argmax(axis=1)]
+    else:
+        probas = None
+        labels = clf.predict(Xv)
+    classes = clf.classes_.tolist()
+    return [(labels[i],
+             None if probas is None else sorted(zip(classes, probas[i].tolist()), key=lambda x:x[1], reverse=True),
+             top_terms.get(labels[i], []))
+            for i in range(len(texts))]
+
+def _batch_worker():
+    while True:
+        items = [_BATCH_QUEUE.get()]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(items) < BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            try: items.append(_BATCH_QUEUE.get(timeout=remaining))
+            except queue.Empty: break
+        groups = {}
+        for name, text, fut in items: groups.setdefault(name, []).append((text, fut))
+        for name, group in groups.items():
+            try:
+                results = _classify_batch(name, [t for t, _ in group])
+            except Exception as e:
+                for _, fut in group: fut.set_exception(e)
+                continue
+            for (_, fut), res in zip(group, results): fut.set_result(res)
+
+threading.Thread(target=_batch_worker, name="predict-batcher", daemon=True).start()
+
+def classify(name, text):
+    """Submit one text to the batcher and wait for its (label, probabilities, top terms)."""
+    fut = Future()
+    _BATCH_QUEUE.put((name, text, fut))
+    return fut.result(timeout=PREDICT_TIMEOUT)
+
+# Warm the cache at import so the first /predict doesn't pay for joblib.load
+for _name, _path in MODEL_PATHS.items():
+    if os.path.exists(_path): load_pipeline(_name)
 
 @app.get('/')
 def home():
@@ -39,25 +138,21 @@ def home():
 
 @app.get('/metrics')
 def metrics():
-    if not os.path.exists(METRICS): return jsonify({'error':'metrics not found; run python train.py'}), 404
-    return jsonify(json.load(open(METRICS,'r',encoding='utf-8')))
+    if not os.path.exists(METRICS): return ojson({'error':'metrics not found; run python train.py'}, 404)
+    with open(METRICS,'rb') as f: return ojson(orjson.loads(f.read()))
 
 @app.post('/predict')
 def predict():
-    if not models_ready(): return jsonify({'error':'models not trained; run python train.py'}), 400
+    if not models_ready(): return ojson({'error':'models not trained; run python train.py'}, 400)
     data = request.get_json(force=True)
     text = (data.get('text') or '').strip()
     model = (data.get('model') or 'auto').lower()
-    if not text: return jsonify({'error':'empty text'}), 400
+    if not text: return ojson({'error':'empty text'}, 400)
     if model not in ('nb','lr','auto'): model='auto'
-    clf = load_pipeline(model if model in ('nb','lr') else 'auto')
-    label = clf.predict([text])[0]
-    probs = None
-    if hasattr(clf, 'predict_proba'):
-        proba = clf.predict_proba([text])[0].tolist()
-        classes = clf.named_steps['clf'].classes_.tolist()
-        probs = sorted(list(zip(classes, [float(x) for x in proba])), key=lambda x:x[1], reverse=True)
-    return jsonify({'label':label, 'probabilities':probs, 'top_terms': top_terms(clf, label, k=15)})
+    name = model if model in ('nb','lr') else 'auto'
+    try: label, probs, top_terms = classify(name, text)
+    except FutureTimeout: return ojson({'error':'prediction timed out; try again'}, 503)
+    return ojson({'label':label, 'probabilities':probs, 'top_terms': top_terms})
 
 if __name__ == '__main__':
     app.run(debug=True)
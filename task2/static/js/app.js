@@ -40,7 +40,7 @@ metricsLink.addEventListener('click', async (e)=>{
       `Docs per class: ${JSON.stringify(m.counts)}\n\n`+
       `CV — NB: mean=${nb.accuracy_mean.toFixed(3)} (±${nb.accuracy_std.toFixed(3)})\n`+
       `CV — LR: mean=${lr.accuracy_mean.toFixed(3)} (±${lr.accuracy_std.toFixed(3)})\n\n`+
-      `Held-out — NB acc=${hnb.accuracy.toFixed(3)} | LR acc=${hlr.accuracy.toFixed(3)}\n`+
+      `Out-of-fold (CV) — NB acc=${hnb.accuracy.toFixed(3)} | LR acc=${hlr.accuracy.toFixed(3)}\n`+
       `Best model: ${best.toUpperCase()}`
     );
   }catch(e){ alert('Metrics not available yet. Run: python train.py'); }